@@ -1,25 +1,197 @@
+import base64
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
+import json
 import os
 from pathlib import Path
 import re
 import shutil
-from typing import Optional
-import PyPDF2
+import time
+from typing import Optional, Tuple
 from decouple import config
+from pdf_text import DATE_RE, iter_header_then_page_text, pdftotext_page
 from process_rfep import process_rfep_list_with_completion_check
 from reclassification_processor import ReclassificationProcessor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from slusdlib import aeries
 import q_update_rfep as q
-from pandas import read_csv
 import csv
 
+# FastAPI bearer tokens are cached here so reruns within the token lifetime skip /token
+_TOKEN_CACHE_PATH = Path.home() / '.cache' / 'rfep_token.json'
+_TOKEN_EXPIRY_MARGIN = 60  # seconds
+_UPLOAD_WORKERS = 6
+
+# Output files carry the RFEP date as {StudentID}_{Name}_{YYYY-MM-DD}_Reclassification_Paperwork.pdf
+_FILENAME_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# decouple re-reads the environment on every config() call, so read settings once
+_TEST_RUN = config('TEST_RUN', default=False, cast=bool)
+_DB = config('DATABASE')
+_DB_EFFECTIVE = f"{_DB}_DAILY" if _TEST_RUN else _DB
+_API_URL = config('FAST_API_URL')
+_API_USER = config('FAST_API_USERNAME')
+_API_PASS = config('FAST_API_PASSWORD')
+
+def _create_session() -> requests.Session:
+    """Create an HTTP session that pools connections to the document API and retries transient failures"""
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        # Only idempotent methods are retried on these; a POST that timed out at the
+        # gateway may already have been stored, and resending it would duplicate the upload
+        status_forcelist=[502, 503, 504],
+    )
+    adapter = HTTPAdapter(pool_connections=_UPLOAD_WORKERS, pool_maxsize=_UPLOAD_WORKERS, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def _token_expiry(token: str) -> Optional[float]:
+    """Read the 'exp' claim from a JWT bearer token without verifying it"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def _read_cached_token() -> Optional[str]:
+    """Return the cached bearer token if it was issued by this API for this user and hasn't expired"""
+    try:
+        cached = json.loads(_TOKEN_CACHE_PATH.read_text())
+        if (cached['url'] == _API_URL and cached['user'] == _API_USER
+                and time.time() < cached['exp'] - _TOKEN_EXPIRY_MARGIN):
+            return cached['token']
+    except (OSError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+def _write_cached_token(token: str, exp: float):
+    """Cache a bearer token on disk, readable only by the current user"""
+    try:
+        _TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(_TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The mode only applies when the file is created; tighten a file left by older runs too
+        os.chmod(_TOKEN_CACHE_PATH, 0o600)
+        with os.fdopen(fd, 'w') as cache_file:
+            json.dump({'url': _API_URL, 'user': _API_USER, 'token': token, 'exp': exp}, cache_file)
+    except OSError as e:
+        print(f"Could not cache API token: {e}")
+
+def _clear_cached_token():
+    """Forget the cached bearer token (e.g. after the API rejected it)"""
+    try:
+        _TOKEN_CACHE_PATH.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"Could not remove cached API token: {e}")
+
+def _get_api_token(session: requests.Session) -> str:
+    """Return a FastAPI bearer token, reusing the on-disk cache while it is still valid"""
+    token = _read_cached_token()
+    if token:
+        return token
+    
+    data = {"username": _API_USER, "password": _API_PASS}
+    response = session.post(f"{_API_URL}/token", data=data)
+    try:
+        token = response.json().get('token')
+    except ValueError:
+        token = None
+    if not token:
+        # Without a token every upload in the batch would be rejected one by one
+        raise RuntimeError(f"FAST_API auth failed: {response.text}")
+    
+    exp = _token_expiry(token)
+    if exp:
+        _write_cached_token(token, exp)
+    return token
+
+def _parse_output_filename(file_path: str) -> Tuple[str, str]:
+    """
+    Get the student ID and name from an output file path
+    
+    Format: {StudentID}_{FirstName}_{LastName}[_{YYYY-MM-DD}]_Reclassification_Paperwork.pdf
+    
+    Returns:
+        (student_id, student_name); the name is 'Unknown' if the filename has no name parts
+    """
+    filename_parts = [part for part in Path(file_path).stem.split('_') if not _FILENAME_DATE_RE.match(part)]
+    student_id = filename_parts[0].strip()
+    if len(filename_parts) > 3:
+        # Find index of "Reclassification" to know where name ends; otherwise
+        # assume the last two parts are "Reclassification" and "Paperwork"
+        try:
+            reclass_idx = filename_parts.index('Reclassification')
+        except ValueError:
+            reclass_idx = len(filename_parts) - 2
+        student_name = ' '.join(filename_parts[1:reclass_idx])
+    else:
+        student_name = 'Unknown'
+    return student_id, student_name
+
+def _filename_rfep_date(file_path: str) -> Optional[str]:
+    """Return the RFEP date (MM/DD/YYYY) encoded in an output filename, or None for older files"""
+    for part in Path(file_path).stem.split('_'):
+        if _FILENAME_DATE_RE.match(part):
+            try:
+                return datetime.strptime(part, '%Y-%m-%d').strftime('%m/%d/%Y')
+            except ValueError:
+                return None
+    return None
+
 def get_previously_uploaded_files():
+    """Return the set of student IDs already recorded in completed_students.csv"""
     try:
-        previous_ids = read_csv('out/completed_students.csv')['Student ID'].astype(str).tolist()
-        return previous_ids
-    except FileNotFoundError:
+        with open('out/completed_students.csv', 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            # Only the Student ID column is needed, so don't build a dict per row
+            id_index = next(reader).index('Student ID')
+            return {row[id_index].strip() for row in reader if len(row) > id_index and row[id_index]}
+    except (FileNotFoundError, StopIteration):
+        return set()
+
+def _upload_one(session: requests.Session, file_path: str, student_id: str, test_run: bool) -> Optional[requests.Response]:
+    """
+    Upload a single student packet to the document management system
+    
+    Returns:
+        The server response, or None if the request itself failed
+    """
+    print(f"Uploading file for student ID: {student_id}")
+    try:
+        # The handle is closed on every path, including non-200 responses and errors.
+        # requests encodes multipart bodies in memory; packets are only a few pages,
+        # and a buffered body is what lets the adapter resend it after a connect error
+        with open(file_path, 'rb') as pdf_file:
+            return session.post(
+                f"{_API_URL}/docs/uploadGeneral",
+                files={"file": (os.path.basename(file_path), pdf_file, 'application/pdf')},
+                data={
+                    "student_id": student_id,
+                    "document_name": os.path.basename(file_path).replace('_', ' '),
+                    "document_type": "RECLASS",
+                    "test_run": test_run
+                }
+            )
+    except (OSError, requests.RequestException) as e:
+        # Keep one bad file or connection from abandoning the rest of the batch
+        print(f"Failed to upload {file_path}: {e}")
+        return None
+
+def _upload_all(session: requests.Session, to_upload: list, test_run: bool) -> list:
+    """Upload (file_path, student_id, student_name) items; returns their responses in order"""
+    if not to_upload:
         return []
+    # Uploads are independent and network-bound, so overlap them on a thread pool
+    with ThreadPoolExecutor(max_workers=min(_UPLOAD_WORKERS, len(to_upload))) as executor:
+        return list(executor.map(
+            lambda item: _upload_one(session, item[0], item[1], test_run), to_upload
+        ))
 
 def upload_created_files(created_files, test_run=True):
     """
@@ -32,51 +204,39 @@ def upload_created_files(created_files, test_run=True):
     Returns:
         List of successfully uploaded files
     """
-    data = {"username": config('FAST_API_USERNAME'), "password": config('FAST_API_PASSWORD')}
-    token = requests.post(
-        f"{config('FAST_API_URL')}/token",
-        data=data,
-       
-    ).json().get('token')
+    session = _create_session()
+    session.headers['Authorization'] = f"Bearer {_get_api_token(session)}"
     previous_student_ids = get_previously_uploaded_files()
     success_files = []
     newly_uploaded = []
+    to_upload = []
     
     for file_path in created_files:
-        student_id = file_path.split('\\')[1].split('_')[0].strip()
-        
-        # Extract student name from filename
-        # Format: {StudentID}_{FirstName}_{LastName}_Reclassification_Paperwork.pdf
-        filename_parts = os.path.basename(file_path).replace('.pdf', '').split('_')
-        if len(filename_parts) > 3:
-            # Find index of "Reclassification" to know where name ends
-            try:
-                reclass_idx = filename_parts.index('Reclassification')
-                student_name = ' '.join(filename_parts[1:reclass_idx])
-            except ValueError:
-                # Fallback: assume last two parts are "Reclassification" and "Paperwork"
-                student_name = ' '.join(filename_parts[1:-2])
-        else:
-            student_name = 'Unknown'
+        student_id, student_name = _parse_output_filename(file_path)
         
         if student_id in previous_student_ids:
             print(f"Skipping upload for student ID {student_id} as it was previously uploaded.")
             continue
-            
-        print(f"Uploading file for student ID: {student_id}")
-        response = requests.post(
-            f"{config('FAST_API_URL')}/docs/uploadGeneral",
-            headers={"Authorization": f"Bearer {token}"},
-            files={"file": open(file_path, 'rb')},
-            data={
-                "student_id": student_id,
-                "document_name": os.path.basename(file_path).replace('_', ' '),
-                "document_type": "RECLASS",
-                "test_run": test_run
-            }
-        )
         
-        if response.status_code != 200:
+        to_upload.append((file_path, student_id, student_name))
+    
+    responses = _upload_all(session, to_upload, test_run)
+    
+    # A cached token can be revoked or rotated before it expires; get a fresh one and
+    # retry the rejected uploads once rather than failing the whole batch
+    rejected = [i for i, response in enumerate(responses) if response is not None and response.status_code == 401]
+    if rejected:
+        print(f"API token rejected for {len(rejected)} upload(s); re-authenticating")
+        _clear_cached_token()
+        session.headers['Authorization'] = f"Bearer {_get_api_token(session)}"
+        retried = _upload_all(session, [to_upload[i] for i in rejected], test_run)
+        for i, response in zip(rejected, retried):
+            responses[i] = response
+    
+    for (file_path, student_id, student_name), response in zip(to_upload, responses):
+        if response is None:
+            continue
+        elif response.status_code != 200:
             print(f"Failed to upload {file_path}: {response.text}")
             continue
         else:
@@ -89,41 +249,38 @@ def upload_created_files(created_files, test_run=True):
                 'output_file': os.path.basename(file_path)
             })
     
-    # Update the completed_students.csv file with newly uploaded students
+    # Append newly uploaded students to completed_students.csv. Previously uploaded
+    # IDs were skipped above, so there's nothing to merge with the existing rows
     if newly_uploaded:
         csv_path = Path('out/completed_students.csv')
+        write_header = not csv_path.exists() or csv_path.stat().st_size == 0
         
-        # Read existing records if file exists
-        existing_students = {}
-        if csv_path.exists():
-            with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    existing_students[row['Student ID']] = row
-            print(f"\nFound {len(existing_students)} existing completed student records")
-        
-        # Add newly uploaded students (or update if already exists)
-        for student in newly_uploaded:
-            existing_students[student['student_id']] = {
+        with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
+            fieldnames = ['Student ID', 'Student Name', 'Completed Date', 'Output File']
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            if write_header:
+                writer.writeheader()
+            writer.writerows({
                 'Student ID': student['student_id'],
                 'Student Name': student['student_name'],
                 'Completed Date': student['completed_date'],
                 'Output File': student['output_file']
-            }
-        
-        # Write all records back (sorted by student ID)
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Student ID', 'Student Name', 'Completed Date', 'Output File']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for student_id in sorted(existing_students.keys()):
-                writer.writerow(existing_students[student_id])
+            } for student in newly_uploaded)
         
         print(f"\n✅ Updated completed_students.csv with {len(newly_uploaded)} newly uploaded student(s)")
-        print(f"📊 Total completed students: {len(existing_students)}")
+        print(f"📊 Total completed students: {len(previous_student_ids) + len(newly_uploaded)}")
     
     return success_files
 
+def _search_date(text: str, where: str = '') -> Optional[str]:
+    """Return the first MM/DD/YYYY-style date in {text}, or None"""
+    match = DATE_RE.search(text)
+    if match is None:
+        return None
+    found_date = match.group(1)
+    print(f"Found date{where}: {found_date}")
+    return found_date
+
 def get_reclass_date(file_path: str) -> Optional[str]:
     """
     Extract the reclassification date from the upper left corner of a PDF.
@@ -134,6 +291,11 @@ def get_reclass_date(file_path: str) -> Optional[str]:
     Returns:
         str: Date in MM/DD/YYYY format if found, None otherwise
     """
+    # Newer output files carry the date in their name; no need to open them
+    found_date = _filename_rfep_date(file_path)
+    if found_date:
+        return found_date
+    
     try:
         # Convert to Path object for better handling
         pdf_path = Path(file_path)
@@ -142,76 +304,65 @@ def get_reclass_date(file_path: str) -> Optional[str]:
             print(f"File not found: {file_path}")
             return None
         
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
+        # pdftotext lays the page out top to bottom, so its first date is the header's
+        page_text = pdftotext_page(pdf_path, collapse_whitespace=True)
+        if page_text is not None:
+            found_date = _search_date(page_text)
+            if found_date:
+                return found_date
+        
+        # Look for the date in the header area (upper portion of the first page),
+        # then the entire first page; never beyond it
+        with closing(iter_header_then_page_text(pdf_path, collapse_whitespace=True)) as texts:
+            header_text = next(texts, None)
             
-            if len(reader.pages) == 0:
+            if header_text is None:
                 print(f"No pages found in PDF: {file_path}")
                 return None
             
-            # Extract text from the first page
-            first_page = reader.pages[0]
-            text = first_page.extract_text()
-            
-            # Normalize ligatures that might appear in PDFs
-            ligature_replacements = {
-                'ﬁ': 'fi',
-                'ﬂ': 'fl',
-                'ﬀ': 'ff',
-                'ﬃ': 'ffi',
-                'ﬄ': 'ffl',
-            }
-            for ligature, replacement in ligature_replacements.items():
-                text = text.replace(ligature, replacement)
+            found_date = _search_date(header_text)
+            if found_date:
+                return found_date
             
-            # Look for date patterns in the first 500 characters (upper portion of page)
-            # This helps ensure we're getting the date from the header area
-            header_text = text[:500]
-            
-            # Multiple date patterns to catch various formats
-            date_patterns = [
-                r'(\d{1,2}/\d{1,2}/\d{4})',  # MM/DD/YYYY or M/D/YYYY
-                r'(\d{1,2}-\d{1,2}-\d{4})',  # MM-DD-YYYY or M-D-YYYY
-                r'(\d{1,2}\.\d{1,2}\.\d{4})', # MM.DD.YYYY or M.D.YYYY
-            ]
-            
-            for pattern in date_patterns:
-                matches = re.findall(pattern, header_text)
-                if matches:
-                    # Return the first date found
-                    found_date = matches[0]
-                    print(f"Found date: {found_date}")
-                    return found_date
-            
-            # If no date found in header, search the entire first page
             print("No date found in header, searching entire first page...")
-            for pattern in date_patterns:
-                matches = re.findall(pattern, text)
-                if matches:
-                    # Return the first date found
-                    found_date = matches[0]
-                    print(f"Found date in full text: {found_date}")
-                    return found_date
-            
-            print(f"No date found in PDF: {file_path}")
-            return None
-            
+            found_date = _search_date(next(texts), ' in full text')
+            if found_date:
+                return found_date
+        
+        print(f"No date found in PDF: {file_path}")
+        return None
+        
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
         return None
 
-def create_rfep_csv(created_files, csv_file_path:str='out/rfep_students.csv'):
-    """Create CSV file with student IDs and RFEP dates"""
-    csv_content = 'Student #,RFEP Date'
+def create_rfep_csv(created_files, csv_file_path:str='out/rfep_students.csv', rfep_dates: Optional[dict] = None):
+    """
+    Create CSV file with student IDs and RFEP dates
+    
+    Args:
+        created_files: List of combined PDF paths
+        csv_file_path: Where to write the CSV
+        rfep_dates: Optional mapping of file path -> RFEP date captured during
+            processing; only files missing from it are re-opened
+    """
+    rfep_dates = dict(rfep_dates or {})
+    
+    # Each file is parsed independently; PyMuPDF isn't thread-safe, so fan out across processes
+    missing_files = [file for file in created_files if not rfep_dates.get(file)]
+    if missing_files:
+        # Worker startup is the expensive part for small batches, so don't spawn idle workers
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(missing_files))) as executor:
+            rfep_dates.update(zip(missing_files, executor.map(get_reclass_date, missing_files)))
+    
+    rows = [('Student #', 'RFEP Date')]
     for file in created_files:
-        rfep_date = get_reclass_date(file)
-        if rfep_date:
-            csv_content += f'\n{file.split("\\")[1].split("_")[0]},{rfep_date}'
-        else:
-            csv_content += f'\n{file.split("\\")[1].split("_")[0]},N/A'
+        student_id, _ = _parse_output_filename(file)
+        rows.append((student_id, rfep_dates.get(file) or 'N/A'))
         print(f"Creating RFEP CSV entry for {file}")
-    with open(csv_file_path, 'w') as f:
-        f.write(csv_content)
+    
+    with open(csv_file_path, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
     return csv_file_path
     
 def archive_processed_files(created_files, archive_folder='archive', csv_file='out/rfep_students.csv'):
@@ -235,7 +386,7 @@ def main():
         created_files = results['created_files']
         
         # Upload files and track in completed_students.csv
-        upload_created_files(created_files, test_run=config('TEST_RUN', default='False', cast=bool))
+        upload_created_files(created_files, test_run=_TEST_RUN)
         
         if results['incomplete_students'] > 0:
             print(f"{results['incomplete_students']} student(s) had incomplete paperwork")
@@ -251,14 +402,10 @@ def main():
         print(f"Processing failed: {results.get('message', 'Unknown error')}")
     
     # Create RFEP CSV for database updates
-    csv_file_path = create_rfep_csv(created_files)
+    csv_file_path = create_rfep_csv(created_files, rfep_dates=results.get('rfep_dates'))
     
     # Update database records
-    cnxn = aeries.get_aeries_cnxn(
-        access_level='w', 
-        database=config('DATABASE') if not config('TEST_RUN', default='False', cast=bool) 
-        else f"{config('DATABASE')}_DAILY"
-    )
+    cnxn = aeries.get_aeries_cnxn(access_level='w', database=_DB_EFFECTIVE)
     
     updates = process_rfep_list_with_completion_check(
         csv=csv_file_path, 
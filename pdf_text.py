@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+PDF text extraction helpers
+
+Text extraction goes through PyMuPDF (fitz), whose C-backed extractor is an
+order of magnitude faster than PyPDF2's pure-Python content stream parser.
+"""
+
+import logging
+import re
+import shutil
+import subprocess
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Union
+
+import fitz
+
+logger = logging.getLogger(__name__)
+
+# MM/DD/YYYY, MM-DD-YYYY or MM.DD.YYYY (1 or 2 digit month/day, consistent separator)
+DATE_RE = re.compile(r'(\d{1,2}([/.-])\d{1,2}\2\d{4})')
+# The reclassification date is printed in the page header (top quarter of the page)
+HEADER_FRACTION = 0.25
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Plain text extraction without ligature preservation (MuPDF expands ﬁ/ﬂ itself)
+# or image blocks; we only scan the text for labels, IDs and dates
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Poppler's pdftotext is faster still for a single page; resolved once at import
+_PDFTOTEXT = shutil.which('pdftotext')
+_PDFTOTEXT_TIMEOUT = 5  # seconds
+
+# Below this many pages, starting worker processes costs more than splitting the document saves
+_PARALLEL_MIN_PAGES = 64
+
+def normalize_text(text: str, collapse_whitespace: bool = False) -> str:
+    """
+    Apply Unicode NFKC normalization to extracted text.
+
+    NFKC folds ligatures (ﬁ -> fi), full-width punctuation and other
+    compatibility forms, and composes decomposed diacritics so the
+    English/Spanish/Chinese patterns match consistently. With
+    collapse_whitespace, runs of whitespace (including newlines) also
+    become a single space.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    if collapse_whitespace:
+        text = _WHITESPACE_RE.sub(' ', text)
+    return text
+
+def extract_page_texts(pdf_path: Union[str, Path], pages: Optional[Sequence[int]] = None,
+                       collapse_whitespace: bool = False, workers: int = 1) -> List[str]:
+    """
+    Extract text from the pages of a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+        pages: Zero-based page numbers to extract (all pages if None).
+            Page numbers past the end of the document are skipped.
+        collapse_whitespace: Collapse whitespace runs to single spaces
+            (see normalize_text). Leave off when patterns rely on newlines.
+        workers: When extracting all pages of a large document, split the
+            page range across this many processes (PyMuPDF isn't thread-safe,
+            so each process opens its own copy of the document)
+
+    Returns:
+        List of normalized page texts in the requested order ('' for any
+        page whose text couldn't be extracted; the error is logged)
+    """
+    # Hand MuPDF the path rather than a Python file object: it maps the file and
+    # resolves objects on demand, so nothing is buffered on the Python side
+    with fitz.open(str(pdf_path)) as doc:
+        if pages is None:
+            if workers > 1 and doc.page_count >= _PARALLEL_MIN_PAGES:
+                return _extract_page_texts_parallel(pdf_path, doc.page_count, collapse_whitespace, workers)
+        return document_page_texts(doc, pages, collapse_whitespace)
+
+def document_page_texts(doc: fitz.Document, pages: Optional[Sequence[int]] = None,
+                        collapse_whitespace: bool = False) -> List[str]:
+    """
+    Extract text from the pages of an already open PyMuPDF document.
+
+    Same as extract_page_texts, for callers that keep documents open across
+    several lookups instead of re-opening the file each time.
+    """
+    if pages is None:
+        pages = range(doc.page_count)
+    return [_page_text(doc, page_num, collapse_whitespace) for page_num in pages if page_num < doc.page_count]
+
+def _page_text(doc: fitz.Document, page_num: int, collapse_whitespace: bool) -> str:
+    """Extract one page's normalized text; a damaged page yields '' instead of failing the document"""
+    try:
+        return normalize_text(doc.load_page(page_num).get_text("text", flags=_TEXT_FLAGS), collapse_whitespace)
+    except Exception as e:
+        logger.error(f"Error extracting text from page {page_num + 1} of {doc.name}: {e}")
+        return ''
+
+def _extract_page_range(pdf_path: Union[str, Path], start: int, stop: int,
+                        collapse_whitespace: bool) -> List[str]:
+    """Worker for _extract_page_texts_parallel: extract pages [start, stop)"""
+    return extract_page_texts(pdf_path, range(start, stop), collapse_whitespace)
+
+def _extract_page_texts_parallel(pdf_path: Union[str, Path], page_count: int,
+                                 collapse_whitespace: bool, workers: int) -> List[str]:
+    """Extract every page of a PDF in contiguous page ranges, one per worker process"""
+    step = -(-page_count // workers)  # ceiling division
+    starts = range(0, page_count, step)
+    with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+        chunks = executor.map(
+            _extract_page_range,
+            [pdf_path] * len(starts), starts, [start + step for start in starts],
+            [collapse_whitespace] * len(starts),
+        )
+        return [text for chunk in chunks for text in chunk]
+
+def iter_header_then_page_text(pdf_path: Union[str, Path], page_num: int = 0,
+                               header_fraction: float = HEADER_FRACTION,
+                               collapse_whitespace: bool = False) -> Iterator[str]:
+    """
+    Yield a page's header text, then its full text.
+
+    The document is opened once and only the requested page is loaded. The
+    header is extracted clipped to the top header_fraction of the page; the
+    full page is only laid out if the caller asks for the second item.
+    Nothing is yielded if the page doesn't exist.
+    """
+    with fitz.open(str(pdf_path)) as doc:
+        if page_num >= doc.page_count:
+            return
+        page = doc.load_page(page_num)
+        rect = page.rect
+        header_rect = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * header_fraction)
+        yield normalize_text(page.get_text("text", clip=header_rect, flags=_TEXT_FLAGS), collapse_whitespace)
+        yield normalize_text(page.get_text("text", flags=_TEXT_FLAGS), collapse_whitespace)
+
+def pdftotext_page(pdf_path: Union[str, Path], page_num: int = 0,
+                   collapse_whitespace: bool = False) -> Optional[str]:
+    """
+    Extract a single page's text with Poppler's pdftotext, if it's installed.
+
+    -layout keeps the page's reading order top to bottom, so the header comes
+    first in the output. Returns None when pdftotext isn't available or fails,
+    so callers can fall back to PyMuPDF.
+    """
+    if _PDFTOTEXT is None:
+        return None
+    page = str(page_num + 1)
+    try:
+        result = subprocess.run(
+            [_PDFTOTEXT, '-f', page, '-l', page, '-layout', str(pdf_path), '-'],
+            capture_output=True, text=True, encoding='utf-8', errors='replace',
+            timeout=_PDFTOTEXT_TIMEOUT, check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return normalize_text(result.stdout, collapse_whitespace)
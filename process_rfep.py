@@ -1,24 +1,29 @@
 # process_rfep_enhanced.py
 from os import path
 import warnings
-import dateparser
 from datetime import datetime, timedelta
 from slusdlib import aeries, core
-from sqlalchemy import text
-from typing import Union, List
+from sqlalchemy import bindparam, text
+from typing import Dict, Union, List
 # import read_gsheet
 import pandas as pd
 import q_update_rfep as q
 from decouple import config
 # from enhanced_gsheet_writeback import EnhancedGSheetWriteback  # Updated import
 
+# Formats create_rfep_csv writes RFEP dates in
+_RFEP_DATE_FORMATS = ('%m/%d/%Y', '%m-%d-%Y', '%m.%d.%Y')
+
+# SQL Server caps a statement at 2100 parameters, so bulk lookups run in chunks
+_BULK_CHUNK_SIZE = 1000
+
 def process_rfep_list_with_completion_check(csv: str, cnxn, gsheet_url: str = None, 
                                           id_header: str = 'Student #', 
                                           rfep_date_header: str = 'RFEP Date'):
     """
     Enhanced RFEP processing that respects existing completion statuses
     """
-    today = dateparser.parse(datetime.today().date().strftime('%m.%d.%Y'))
+    today = datetime.today()
     df_reclass_list = pd.read_csv(csv)
     
     # Initialize enhanced writeback handler
@@ -44,99 +49,117 @@ def process_rfep_list_with_completion_check(csv: str, cnxn, gsheet_url: str = No
     #     core.log(f"{already_complete_count} students already completed (will be skipped silently)")
     # core.log(f"{total_students_in_sheet - already_complete_count} students available for processing")
     
-    for _, row in df_reclass_list.iterrows():
-        stu_id = row[id_header]
-        
-        if stu_id in skip_list:
-            continue
+    # Look up RFEP/enrollment/LAC/LIP status for every student up front
+    # instead of 4-5 queries per student
+    stu_ids = [int(stu_id) for stu_id in df_reclass_list[id_header].dropna()]
+    lookups = load_student_lookups(stu_ids, cnxn)
+    
+    # One connection for the whole run; each student's updates commit together
+    with cnxn.connect() as conn:
+        for _, row in df_reclass_list.iterrows():
+            stu_id = row[id_header]
             
-        if pd.isna(stu_id) or pd.isna(row[rfep_date_header]):
-            if not pd.isna(stu_id):  # Only log if we have a student ID
-                updates.append({
-                    'student_id': int(stu_id),
-                    'status': 'error',
-                    'error_message': 'Missing student ID or RFEP date'
+            if stu_id in skip_list:
+                continue
+                
+            if pd.isna(stu_id) or pd.isna(row[rfep_date_header]):
+                if not pd.isna(stu_id):  # Only log if we have a student ID
+                    updates.append({
+                        'student_id': int(stu_id),
+                        'status': 'error',
+                        'error_message': 'Missing student ID or RFEP date'
+                    })
+                continue
+            
+            stu_id = int(stu_id)
+            
+            # Check if this student is already complete before processing
+            
+            try:
+                # Check if student is already RFEP
+                rfep_check = stu_id in lookups['rfep']
+                if not rfep_check and stu_id not in lookups['enrolled']:
+                    core.log(f'ERROR: Student ID# {stu_id} is not enrolled in target school year')
+                    rfep_check = True
+                if rfep_check == True:
+                    updates.append({
+                        'student_id': stu_id,
+                        'status': 'error',
+                        'error_message': 'Student already RFEP or not enrolled'
+                    })
+                    continue
+                
+                # Parse RFEP date
+                try:
+                    rfep_date = parse_rfep_date(row[rfep_date_header])
+                except Exception as e:
+                    updates.append({
+                        'student_id': stu_id,
+                        'status': 'error',
+                        'error_message': f'Invalid date format: {e}'
+                    })
+                    continue
+                
+                # Build SQL queries (your existing logic) as (statement, bind params) pairs
+                sql = {}
+                if stu_id not in lookups['lac_comments']:
+                    raise ValueError('No LAC record found')
+                append_comment = _append_comment(
+                    lookups['lac_comments'][stu_id], today=today,
+                    append_string='Student is RFEP, LAC closed by automation'
+                )
+                lac_end_date = rfep_date - timedelta(days=1)
+                
+                sql['lac_sql'] = (q.update_rfep_lac_record, {
+                    'stu_id': stu_id, 'rfep_date': rfep_date,
+                    'appended_comment': append_comment, 'lac_end_date': lac_end_date
                 })
-            continue
-        
-        stu_id = int(stu_id)
-        
-        # Check if this student is already complete before processing
-        
-        try:
-            # Check if student is already RFEP
-            rfep_check = student_is_rfep(id=stu_id, cnxn=cnxn)
-            if rfep_check == True:
+                sql['stu_sql'] = (q.update_rfep_stu_record, {
+                    'stu_id': stu_id, 'lf_level': '4'
+                })
+                
+                # Check for LIP record
+                lip_check = stu_id in lookups['lip_comments']
+                if lip_check == True:
+                    new_pgm_comment = _append_comment(
+                        lookups['lip_comments'][stu_id], today=today,
+                        append_string='Student is RFEP, LIP record closed by automation.'
+                    )
+                    sql['lip_sql'] = (q.close_lip, {
+                        'stu_id': stu_id, 'end_date': lac_end_date, 'new_comment': new_pgm_comment
+                    })
+                
+                print(f'Student #: {stu_id}')
+                
+                # Execute this student's updates as one transaction on the shared connection
+                try:
+                    for key, (query, params) in sql.items():
+                        conn.execute(text(query), params)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                
+                # Guard against the same student appearing twice in the list
+                lookups['rfep'].add(stu_id)
+                
+                # Mark as complete
                 updates.append({
                     'student_id': stu_id,
-                    'status': 'error',
-                    'error_message': 'Student already RFEP or not enrolled'
+                    'status': 'complete'
                 })
-                continue
-            
-            # Parse RFEP date
-            try:
-                rfep_date = dateparser.parse(row[rfep_date_header])
+                
+                core.log(f'Student #{stu_id}: Updated LAC and LIP records')
+                print(f'Successfully updated student #{stu_id}')
+                
             except Exception as e:
                 updates.append({
                     'student_id': stu_id,
                     'status': 'error',
-                    'error_message': f'Invalid date format: {e}'
+                    'error_message': str(e)
                 })
-                continue
-            
-            # Build SQL queries (your existing logic)
-            sql = {}
-            append_comment = append_to_lac_comment(
-                id=stu_id, cnxn=cnxn, today=today, 
-                append_string='Student is RFEP, LAC closed by automation'
-            )
-            lac_end_date = rfep_date - timedelta(days=1)
-            
-            sql['lac_sql'] = q.update_rfep_lac_record.format(
-                stu_id=stu_id, rfep_date=rfep_date, 
-                appended_comment=append_comment, lac_end_date=lac_end_date
-            )
-            sql['stu_sql'] = q.update_rfep_stu_record.format(
-                stu_id=stu_id, lf_level='4'
-            )
-            
-            # Check for LIP record
-            lip_check = has_open_lip(id=stu_id, cnxn=cnxn)
-            if lip_check == True:
-                new_pgm_comment = append_to_pgm_comment(
-                    id=stu_id, cnxn=cnxn, today=today, 
-                    append_string='Student is RFEP, LIP record closed by automation.'
-                )
-                sql['lip_sql'] = q.close_lip.format(
-                    stu_id=stu_id, end_date=lac_end_date, new_comment=new_pgm_comment
-                )
-            
-            print(f'Student #: {stu_id}')
-            
-            # Execute SQL updates
-            with cnxn.connect() as conn:
-                for key, query in sql.items():
-                    conn.execute(text(query))
-                conn.commit()
-            
-            # Mark as complete
-            updates.append({
-                'student_id': stu_id,
-                'status': 'complete'
-            })
-            
-            core.log(f'Student #{stu_id}: Updated LAC and LIP records')
-            print(f'Successfully updated student #{stu_id}')
-            
-        except Exception as e:
-            updates.append({
-                'student_id': stu_id,
-                'status': 'error',
-                'error_message': str(e)
-            })
-            core.log(f'ERROR processing student {stu_id}: {e}')
-            print(f'ERROR: {e}')
+                core.log(f'ERROR processing student {stu_id}: {e}')
+                print(f'ERROR: {e}')
     
     # Enhanced batch update with completion checking
     # if updates:
@@ -163,18 +186,73 @@ def process_rfep_list_with_completion_check(csv: str, cnxn, gsheet_url: str = No
     
     return updates
 
+def parse_rfep_date(value: str) -> datetime:
+    """Parses an RFEP date, trying the known MM/DD/YYYY-style formats before dateparser"""
+    value = str(value).strip()
+    for fmt in _RFEP_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    
+    # Hand-edited lists can use other formats; dateparser is slow, so it's only the fallback
+    import dateparser
+    parsed = dateparser.parse(value)
+    if parsed is None:
+        raise ValueError(f"Unrecognized date '{value}'")
+    return parsed
+
+def _first_row(sql: str, cnxn, **params):
+    """Returns the first row of {sql}, or None, without building a DataFrame"""
+    with cnxn.connect() as conn:
+        return conn.execute(text(sql), params).first()
+
+def _bulk_rows(sql: str, stu_ids: List[int], conn) -> list:
+    """Run a bulk lookup query (with an expanding :stu_ids parameter) over {stu_ids} in chunks"""
+    statement = text(sql).bindparams(bindparam('stu_ids', expanding=True))
+    rows = []
+    for start in range(0, len(stu_ids), _BULK_CHUNK_SIZE):
+        chunk = stu_ids[start:start + _BULK_CHUNK_SIZE]
+        rows.extend(conn.execute(statement, {'stu_ids': chunk}).all())
+    return rows
+
+def load_student_lookups(stu_ids: List[int], cnxn) -> Dict:
+    """
+    Fetch the status every student in {stu_ids} needs for RFEP processing
+    
+    Returns:
+        dict with 'rfep' (IDs already RFEP), 'enrolled' (IDs enrolled in the target year),
+        'lac_comments' and 'lip_comments' (ID -> existing LAC / open LIP comment)
+    """
+    if not stu_ids:
+        return {'rfep': set(), 'enrolled': set(), 'lac_comments': {}, 'lip_comments': {}}
+    
+    with cnxn.connect() as conn:
+        lac_comments = {}
+        for stu_id, comment in _bulk_rows(q.bulk_lac_comments, stu_ids, conn):
+            lac_comments.setdefault(int(stu_id), comment)
+        lip_comments = {}
+        for stu_id, comment in _bulk_rows(q.bulk_lip_pgm_comments, stu_ids, conn):
+            lip_comments.setdefault(int(stu_id), comment)
+        
+        return {
+            'rfep': {int(row[0]) for row in _bulk_rows(q.bulk_rfep_check, stu_ids, conn)},
+            'enrolled': {int(row[0]) for row in _bulk_rows(q.bulk_attendance_check, stu_ids, conn)},
+            'lac_comments': lac_comments,
+            'lip_comments': lip_comments,
+        }
+
+def _append_comment(original_comment: str, today: datetime, append_string: str) -> str:
+    """Appends {append_string} and today's date to an existing record comment"""
+    return original_comment + ' // ' + append_string + ' 🤖 ' + today.strftime('%m.%d.%Y')
+
 # Keep your existing helper functions unchanged
 def student_is_rfep(id: str, cnxn) -> Union[bool, str]:
     """Checks if the student is RFEP or not"""
-    sql = q.rfep_check.format(stu_id=id)
-    data = pd.read_sql(sql, cnxn)
-
-    check = False if data.empty else True
+    check = _first_row(q.rfep_check, cnxn, stu_id=id) is not None
     if check == True: return check
-    attendance_sql = q.attendance_check.format(stu_id=id)
-    data2 = pd.read_sql(attendance_sql, cnxn)
 
-    check2 = False if data2.empty else True
+    check2 = _first_row(q.attendance_check, cnxn, stu_id=id) is not None
     if check2 == False: 
         core.log(f'ERROR: Student ID# {id} is not enrolled in target school year')
         return True
@@ -182,25 +260,21 @@ def student_is_rfep(id: str, cnxn) -> Union[bool, str]:
 
 def append_to_lac_comment(id: str, cnxn, today: datetime, append_string='Updated by automation on ') -> str:
     """Gets original comment from LAC table and appends {append_string} to it"""
-    sql = q.get_lac_commnet.format(stu_id=id)
-    original_comment = pd.read_sql(sql, cnxn).values[0][0]
-    new_comment = original_comment + ' // ' + append_string + ' 🤖 ' + today.strftime('%m.%d.%Y')
-    new_comment = new_comment.replace("'", "")
-    return new_comment 
+    row = _first_row(q.get_lac_commnet, cnxn, stu_id=id)
+    if row is None:
+        raise ValueError('No LAC record found')
+    return _append_comment(row[0], today, append_string)
 
 def append_to_pgm_comment(id: str, cnxn, today: datetime, append_string: str='Closed by automation on ') -> str:
     """Gets original comment from open PGM record and appends {append_string} to it"""
-    sql = q.get_lip_pgm_commnet.format(stu_id=id)
-    original_comment = pd.read_sql(sql, cnxn).values[0][0]
-    new_comment = original_comment + ' // ' + append_string + ' 🤖 ' + today.strftime('%m.%d.%Y')
-    return new_comment 
+    row = _first_row(q.get_lip_pgm_commnet, cnxn, stu_id=id)
+    if row is None:
+        raise ValueError('No open LIP record found')
+    return _append_comment(row[0], today, append_string)
 
 def has_open_lip(id: str, cnxn) -> bool:
     """Checks if the student has an open LIP program record"""
-    sql = q.lip_check.format(stu_id=id)
-    data = pd.read_sql(sql, cnxn)
-    check = False if data.empty else True
-    return check
+    return _first_row(q.lip_check, cnxn, stu_id=id) is not None
 
 if __name__ == '__main__':
     # Ignore dateparser warnings regarding pytz
@@ -210,14 +284,14 @@ if __name__ == '__main__':
     )
     
     # Configuration
-    db_str = config('DATABASE') if not config('TEST_RUN', default='False', cast=bool) else f"{config('DATABASE')}_DAILY" if config('TEST_RUN', default='False', cast=bool) else config('DATABASE')
-    test_run = config('TEST_RUN', default='False', cast=bool)
+    test_run = config('TEST_RUN', default=False, cast=bool)
+    db_str = f"{config('DATABASE')}_DAILY" if test_run else config('DATABASE')
     
     # Read RFEP data from Google Sheet
     in_file = 'out/rfep_dates.csv'
     
     # Database connection
-    cnxn = aeries.get_aeries_cnxn(access_level='w', database=config('DATABASE') if not config('TEST_RUN', default='False', cast=bool) else f"{config('DATABASE')}_DAILY" if config('TEST_RUN', default='False', cast=bool) else config('DATABASE'))
+    cnxn = aeries.get_aeries_cnxn(access_level='w', database=db_str)
     
     date = datetime.today().strftime('%Y-%m-%d')
     core.log(f'~~~~~~~~~~~~~ Starting  RFEP Process for {date} ~~~~~~~~~~~~~')
@@ -1,39 +1,39 @@
 update_rfep_lac_record = """
 UPDATE lac
-set RD1 = '{rfep_date}'
+set RD1 = :rfep_date
 , pr = ''
 , ld = ''
 , ece = ''
 , li = ''
 , sr = ''
 , lt = ''
-, ed = '{lac_end_date}'
-, co = N'{appended_comment}'
-where id = '{stu_id}'
+, ed = :lac_end_date
+, co = :appended_comment
+where id = :stu_id
 """
 
 get_lac_commnet = """
 select co
 from lac
-where id = '{stu_id}'
+where id = :stu_id
 """
 
 update_rfep_stu_record = """
 update stu
-set lf = '{lf_level}'
-where id = '{stu_id}'
+set lf = :lf_level
+where id = :stu_id
 """
 
 rfep_check = """
 select id,lf
 from stu
-where id = '{stu_id}'
+where id = :stu_id
 and lf = '4'
 """
 get_lip_pgm_commnet = """
 select co
 from pgm
-where pid = '{stu_id}'
+where pid = :stu_id
 and CD in ('301','305','306')
 and eed is null
 """
@@ -44,22 +44,53 @@ from pgm
 where 1=1
 and EED is null
 and CD in ('301','305','306')
-and pid = '{stu_id}'
+and pid = :stu_id
 """
 
 close_lip = """
-update pgm 
-set eed = '{end_date}',
-co = N'{new_comment}'
+update pgm
+set eed = :end_date,
+co = :new_comment
 where CD in ('301','305','306')
-and pid = '{stu_id}'
+and pid = :stu_id
 """
 
 attendance_check = """
 select *
 from stu
 where 1=1
-and stu.id = {stu_id}
+and stu.id = :stu_id
 and stu.del = 0
 and stu.tg = ''
-"""
\ No newline at end of file
+"""
+
+# Bulk lookups for a whole reclass list; :stu_ids is an expanding bind parameter
+bulk_rfep_check = """
+select id
+from stu
+where id in :stu_ids
+and lf = '4'
+"""
+
+bulk_attendance_check = """
+select id
+from stu
+where 1=1
+and stu.id in :stu_ids
+and stu.del = 0
+and stu.tg = ''
+"""
+
+bulk_lac_comments = """
+select id, co
+from lac
+where id in :stu_ids
+"""
+
+bulk_lip_pgm_comments = """
+select pid, co
+from pgm
+where pid in :stu_ids
+and CD in ('301','305','306')
+and eed is null
+"""
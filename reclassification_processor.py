@@ -14,13 +14,20 @@ Processes reclassification paperwork PDFs by:
 import os
 import re
 import csv
-import PyPDF2
-from typing import Dict, List, Tuple, Optional
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 import logging
 
+import fitz
+
+from pdf_text import DATE_RE, document_page_texts, extract_page_texts
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,7 +35,92 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Page text extraction and pattern matching are CPU-bound, so PDFs are spread over a few processes
+_MAX_PDF_WORKERS = 4
+
+# Student ID pattern (English, Chinese and Spanish labels, 5 or 6 digits)
+_STUDENT_ID_RE = re.compile(
+    r'(?:Student ID[#:\s]*|学号[#:\s]*|N°\s*de\s*identificación\s*del\s*estudiante[#:\s]*)(\d{5,6})',
+    re.IGNORECASE
+)
+
+# Cheap pre-filters: a page without one of these (lowercase) labels, or without
+# a 5+ digit run, can't contain a student ID
+_STUDENT_ID_LABELS = ('student id', '学号', 'identificación')
+_DIGIT_RUN_RE = re.compile(r'\d{5}')
+
+# Standard name patterns
+_NAME_LABEL_RES = tuple(re.compile(p, re.IGNORECASE) for p in [
+    r'Name:\s*([A-Za-z][A-Za-z\s\'-]{2,40}?)(?:\s+Student ID|\s+Grade|\n)',
+    r'Student:\s*([A-Za-z][A-Za-z\s\'-]{2,40}?)(?:\s+Student ID|\s+Grade|\n)',
+])
+# More flexible pattern that captures name before "Student ID" keyword
+_NAME_BEFORE_ID_LABEL_RE = re.compile(
+    r'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{2,40}?)\s+Student\s+ID', re.IGNORECASE
+)
+_NAME_TRANSLATION_RES = tuple(re.compile(p, re.IGNORECASE) for p in [
+    # Spanish patterns
+    r'Nombre[:\s]+([A-Za-z\s\'-]+?)(?:\s+Grado|\s+N°|\n)',
+    r'Estudiante[:\s]+([A-Za-z\s\'-]+?)(?:\s+Grado|\n)',
+])
+# Chinese pattern; tried last, and only on pages with non-ASCII text since it needs the 学生 label
+_NAME_CHINESE_RE = re.compile(r'学生[:\s]*([A-Za-z\s\u4e00-\u9fff\'-]+?)(?:\s+学号|\n)', re.IGNORECASE)
+# Looser patterns for _extract_student_name_from_docs (see _fallback_name_res)
+_NAME_BEFORE_GRADE_RE = re.compile(r'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{2,40}?)\s+Grade', re.IGNORECASE)
+_NAME_BEFORE_ID_RE = re.compile(r'Name[:\s]+([A-Za-z][A-Za-z\s\'-]{2,40}?)\s+Student\s+ID', re.IGNORECASE)
+
+# Continuation/translation page markers (pages without student ID), found in one scan;
+# the group name says which kind of marker matched
+_PAGE_MARKER_RE = re.compile(
+    r'(?P<translation>退出英语教学计划的通知'
+    r'|Notificación de salida del programa de idioma inglés'
+    r'|学生信息'
+    r'|Información del estudiante)'
+    r'|(?P<signature>signature|parent.*?guardian|consulta)',
+    re.IGNORECASE
+)
+_ENGLISH_STUDENT_ID_RE = re.compile(r'Student ID[#:\s]*\d{5,6}', re.IGNORECASE)
+
+_DATE_SEPARATOR_RE = re.compile(r'[.-]')
+
+# Ligatures and their ASCII spellings, applied in one pass by str.translate
+_LIGATURE_TABLE = str.maketrans({
+    'ﬁ': 'fi',
+    'ﬂ': 'fl',
+    'ﬀ': 'ff',
+    'ﬃ': 'ffi',
+    'ﬄ': 'ffl',
+})
+
+# Names sit next to the student ID, so name patterns stop this many characters past it
+_NAME_SEARCH_WINDOW = 1000
+
+_NAME_TRIM_RE = re.compile(r'^[\s\-\']+|[\s\-\']+$')
+
+@lru_cache(maxsize=256)
+def _name_res(student_id: str) -> Tuple[re.Pattern, ...]:
+    """Name patterns for a student, in priority order; each student's pages share one compiled set"""
+    return (
+        *_NAME_LABEL_RES,
+        # Pattern for when name appears right before Student ID with the ID number
+        re.compile(rf'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{{2,40}}?)\s+Student ID[#:\s]*{student_id}', re.IGNORECASE),
+        _NAME_BEFORE_ID_LABEL_RE,
+        # Pattern for table-like format (Name in one cell, ID in another)
+        re.compile(rf'([A-Za-z][A-Za-z\s\'-]{{2,40}})\s+{student_id}', re.IGNORECASE),
+        *_NAME_TRANSLATION_RES,
+    )
+
+@lru_cache(maxsize=256)
+def _fallback_name_res(student_id: str) -> Tuple[re.Pattern, ...]:
+    """Looser name patterns used when a student's documents yielded no name"""
+    return (
+        re.compile(rf'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{{2,40}}?)\s+Student ID[#:\s]*{student_id}', re.IGNORECASE),
+        re.compile(rf'([A-Za-z][A-Za-z\s\'-]{{2,40}})\s+{student_id}\s+', re.IGNORECASE),
+        _NAME_BEFORE_GRADE_RE,
+        _NAME_BEFORE_ID_RE,
+    )
+
+@dataclass(slots=True, frozen=True, eq=False)
 class DocumentInfo:
     """Information about a processed document"""
     file_path: str
@@ -37,6 +129,15 @@ class DocumentInfo:
     document_type: str
     pages: List[int]
     page_count: int
+    rfep_date: Optional[str] = None
+
+@dataclass(slots=True, frozen=True)
+class PageMarkers:
+    """Student IDs and continuation markers found on an unassigned page"""
+    student_ids: FrozenSet[str]
+    is_translation: bool
+    # Signature/consultation page without an English student ID
+    is_signature_page: bool
 
 class ReclassificationProcessor:
     """Main processor for reclassification paperwork"""
@@ -56,6 +157,22 @@ class ReclassificationProcessor:
             'title': 'Notification of English Language Program Exit'
         }
     }
+    # All document types in one alternation (one named group per type) so each page is scanned once
+    _DOCUMENT_TYPE_RE = re.compile(
+        '|'.join(f"(?P<{doc_key}>{doc_info['pattern']})" for doc_key, doc_info in DOCUMENT_PATTERNS.items()),
+        re.IGNORECASE
+    )
+    # Every DOCUMENT_PATTERNS alternative contains one of these (lowercase); pages with
+    # none of them can't match, so the regex is skipped for them
+    _DOCUMENT_TYPE_ANCHORS = ('reclassification', 'teacher evaluation', 'notification of english')
+    
+    # Documents every student needs for a complete packet, one bit per type
+    _REQUIRED_DOC_BITS = {
+        'Teacher Recommendation Form': 1,
+        'Reclassification Meeting': 2,
+        'Notification of English Language Program Exit': 4,
+    }
+    _ALL_REQUIRED_DOCS = 0b111
     
     def __init__(self, input_dir: str = "in", output_dir: str = "out"):
         self.input_dir = Path(input_dir)
@@ -74,54 +191,58 @@ class ReclassificationProcessor:
             logger.warning(f"No PDF files found in {self.input_dir}")
             return {}
         
-        all_documents = []
         for pdf_file in pdf_files:
             logger.info(f"Processing {pdf_file.name}...")
-            documents = self._process_pdf_file(pdf_file)
-            all_documents.extend(documents)
+        
+        all_documents = []
+        workers = min(os.cpu_count() or 1, _MAX_PDF_WORKERS)
+        if len(pdf_files) == 1:
+            # A single (often very large) scan can't be spread across files, so split its pages instead
+            all_documents.extend(self._process_pdf_file(pdf_files[0], extract_workers=workers))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pdf_files))) as executor:
+                for documents in executor.map(self._process_pdf_file, pdf_files):
+                    all_documents.extend(documents)
         
         # Group documents by student
         return self._group_by_student(all_documents)
     
-    def _process_pdf_file(self, pdf_path: Path) -> List[DocumentInfo]:
+    def _process_pdf_file(self, pdf_path: Path, extract_workers: int = 1) -> List[DocumentInfo]:
         """Process a single PDF file and extract document information"""
         documents = []
         
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                total_pages = len(reader.pages)
-                
-                logger.info(f"Processing {pdf_path.name} - {total_pages} pages")
-                
-                # Find all pages with student IDs
-                student_page_map = {}
-                
-                for page_num in range(total_pages):
-                    try:
-                        page = reader.pages[page_num]
-                        text = page.extract_text()
-                        page_info = self._identify_document_and_student(text)
-                        
-                        if page_info:
-                            student_id = page_info['student_id']
-                            if student_id not in student_page_map:
-                                student_page_map[student_id] = []
-                            
-                            student_page_map[student_id].append({
-                                'page_num': page_num,
-                                'doc_type': page_info['document_type'],
-                                'student_name': page_info['student_name']
-                            })
-                            
-                            logger.debug(f"Page {page_num + 1}: {page_info['document_type']} for {student_id}")
+            # PyMuPDF extracts text far faster than PyPDF2. A page that can't be read comes
+            # back as empty text, so only a file that can't be opened fails here
+            page_texts = extract_page_texts(pdf_path, workers=extract_workers)
+            total_pages = len(page_texts)
+            
+            logger.info(f"Processing {pdf_path.name} - {total_pages} pages")
+            
+            # Find all pages with student IDs
+            student_page_map = defaultdict(list)
+            
+            for page_num, text in enumerate(page_texts):
+                try:
+                    page_info = self._identify_document_and_student(text)
                     
-                    except Exception as e:
-                        logger.error(f"Error processing page {page_num + 1}: {e}")
-                        continue
+                    if page_info:
+                        student_id = page_info['student_id']
+                        student_page_map[student_id].append({
+                            'page_num': page_num,
+                            'doc_type': page_info['document_type'],
+                            'student_name': page_info['student_name'],
+                            'rfep_date': page_info['rfep_date']
+                        })
+                        
+                        logger.debug(f"Page {page_num + 1}: {page_info['document_type']} for {student_id}")
                 
-                # Assign unassigned pages to students
-                documents = self._create_documents_from_student_pages(pdf_path, student_page_map, total_pages)
+                except Exception as e:
+                    logger.error(f"Error processing page {page_num + 1}: {e}")
+                    continue
+            
+            # Assign unassigned pages to students
+            documents = self._create_documents_from_student_pages(pdf_path, student_page_map, page_texts)
         
         except Exception as e:
             logger.error(f"Error processing {pdf_path}: {e}")
@@ -130,16 +251,7 @@ class ReclassificationProcessor:
     
     def _normalize_ligatures(self, text: str) -> str:
         """Normalize ligatures and special characters to standard ASCII"""
-        replacements = {
-            'ﬁ': 'fi',
-            'ﬂ': 'fl',
-            'ﬀ': 'ff',
-            'ﬃ': 'ffi',
-            'ﬄ': 'ffl',
-        }
-        for ligature, replacement in replacements.items():
-            text = text.replace(ligature, replacement)
-        return text
+        return text.translate(_LIGATURE_TABLE)
     
     def _identify_document_and_student(self, text: str) -> Optional[Dict[str, str]]:
         """Identify document type and extract student information"""
@@ -148,9 +260,15 @@ class ReclassificationProcessor:
         text = self._normalize_ligatures(text)
         
         # Find document type
+        lowered = text.lower()
+        if not any(anchor in lowered for anchor in self._DOCUMENT_TYPE_ANCHORS):
+            return None
+        
+        # (if a page mentions several types, the first in DOCUMENT_PATTERNS wins)
+        found_keys = {match.lastgroup for match in self._DOCUMENT_TYPE_RE.finditer(text)}
         document_type = None
         for doc_key, doc_info in self.DOCUMENT_PATTERNS.items():
-            if re.search(doc_info['pattern'], text, re.IGNORECASE):
+            if doc_key in found_keys:
                 document_type = doc_info['title']
                 break
         
@@ -158,54 +276,29 @@ class ReclassificationProcessor:
             return None
         
         # Find student ID
-        student_id_patterns = [
-            r'Student ID#?\s*:?\s*(\d{6})',
-            r'Student ID#?\s*:?\s*(\d{5})',
-            r'Student ID[#:\s]*(\d{6})',
-            r'Student ID[#:\s]*(\d{5})',
-            r'学号[#:\s]*(\d{6})',
-            r'学号[#:\s]*(\d{5})',
-            r'N°\s*de\s*identificación\s*del\s*estudiante[#:\s]*(\d{6})',
-            r'N°\s*de\s*identificación\s*del\s*estudiante[#:\s]*(\d{5})',
-        ]
-        
-        student_id = None
-        for pattern in student_id_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                student_id = match.group(1)
-                break
+        if not any(label in lowered for label in _STUDENT_ID_LABELS):
+            return None
+        if not _DIGIT_RUN_RE.search(text):
+            return None
         
-        if not student_id:
+        match = _STUDENT_ID_RE.search(text)
+        if not match:
             return None
+        student_id = match.group(1)
+        name_endpos = match.end() + _NAME_SEARCH_WINDOW
         
         # Find student name with improved patterns
-        name_patterns = [
-            # Standard patterns
-            r'Name:\s*([A-Za-z][A-Za-z\s\'-]{2,40}?)(?:\s+Student ID|\s+Grade|\n)',
-            r'Student:\s*([A-Za-z][A-Za-z\s\'-]{2,40}?)(?:\s+Student ID|\s+Grade|\n)',
-            # Pattern for when name appears right before Student ID with the ID number
-            rf'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{{2,40}}?)\s+Student ID[#:\s]*{student_id}',
-            # More flexible pattern that captures name before "Student ID" keyword
-            r'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{2,40}?)\s+Student\s+ID',
-            # Pattern for table-like format (Name in one cell, ID in another)
-            rf'([A-Za-z][A-Za-z\s\'-]{{2,40}})\s+{student_id}',
-            # Chinese patterns
-            r'学生[:\s]*([A-Za-z\s\u4e00-\u9fff\'-]+?)(?:\s+学号|\n)',
-            # Spanish patterns
-            r'Nombre[:\s]+([A-Za-z\s\'-]+?)(?:\s+Grado|\s+N°|\n)',
-            r'Estudiante[:\s]+([A-Za-z\s\'-]+?)(?:\s+Grado|\n)',
-        ]
-        
         student_name = "Unknown"
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        name_res = _name_res(student_id)
+        if not text.isascii():
+            name_res += (_NAME_CHINESE_RE,)
+        for pattern in name_res:
+            match = pattern.search(text, 0, name_endpos)
             if match:
-                name = match.group(1).strip()
-                # Clean up the name
-                name = re.sub(r'\s+', ' ', name)
+                # Clean up the name (split() also strips the ends)
+                name = ' '.join(match.group(1).split())
                 # Remove trailing/leading special chars
-                name = re.sub(r'^[\s\-\']+|[\s\-\']+$', '', name)
+                name = _NAME_TRIM_RE.sub('', name)
                 # Filter out noise and validate
                 if len(name) > 2 and not any(char.isdigit() for char in name):
                     # Make sure it's not a form field or other text
@@ -214,32 +307,35 @@ class ReclassificationProcessor:
                         student_name = name
                         break
         
+        # Capture the header date now so the combined PDF doesn't need re-reading later
+        date_match = DATE_RE.search(text)
+        
         return {
             'document_type': document_type,
             'student_id': student_id,
-            'student_name': student_name
+            'student_name': student_name,
+            'rfep_date': date_match.group(1) if date_match else None
         }
     
-    def _create_documents_from_student_pages(self, pdf_path: Path, student_page_map: Dict, total_pages: int) -> List[DocumentInfo]:
+    def _create_documents_from_student_pages(self, pdf_path: Path, student_page_map: Dict, page_texts: List[str]) -> List[DocumentInfo]:
         """Create DocumentInfo objects from student page mappings"""
         documents = []
+        total_pages = len(page_texts)
         
-        # Sort students by first page appearance
-        sorted_students = sorted(student_page_map.items(), 
-                               key=lambda x: min(p['page_num'] for p in x[1]))
+        # Sort students by first page appearance (pages are recorded in page order)
+        first_pages = {student_id: pages[0]['page_num'] for student_id, pages in student_page_map.items()}
+        sorted_students = sorted(student_page_map.items(), key=lambda x: first_pages[x[0]])
         
         # First, determine safe boundaries for each student
         student_boundaries = {}
         for i, (student_id, pages) in enumerate(sorted_students):
             identified_pages = [p['page_num'] for p in pages]
-            min_page = min(identified_pages)
-            max_page = max(identified_pages)
+            min_page = identified_pages[0]
+            max_page = identified_pages[-1]
             
             # Determine safe upper boundary
             if i + 1 < len(sorted_students):
-                next_student_pages = [p['page_num'] for p in sorted_students[i + 1][1]]
-                next_min = min(next_student_pages)
-                safe_upper_bound = next_min - 1
+                safe_upper_bound = first_pages[sorted_students[i + 1][0]] - 1
             else:
                 safe_upper_bound = total_pages - 1
             
@@ -251,6 +347,9 @@ class ReclassificationProcessor:
             
             logger.debug(f"Student {student_id}: pages {identified_pages}, safe boundary: {min_page}-{safe_upper_bound}")
         
+        # Candidate pages can fall in more than one student's range; classify each once
+        page_markers: Dict[int, PageMarkers] = {}
+        
         # Now assign continuation/translation pages more carefully
         all_identified_pages = set()
         for pages in student_page_map.values():
@@ -260,143 +359,142 @@ class ReclassificationProcessor:
             boundaries = student_boundaries[student_id]
             
             # Group pages by document type
-            doc_groups = {}
+            doc_groups = defaultdict(list)
             for page_info in pages:
-                doc_type = page_info['doc_type']
-                if doc_type not in doc_groups:
-                    doc_groups[doc_type] = []
-                doc_groups[doc_type].append(page_info['page_num'])
+                doc_groups[page_info['doc_type']].append(page_info['page_num'])
+            
+            # Look for unassigned continuation/translation pages within safe boundaries.
+            # A page joins the document whose nearest page comes before it, so sweep
+            # upwards keeping track of that page instead of rescanning every group
+            assigned = sorted((p, doc_type) for doc_type, doc_pages in doc_groups.items() for p in doc_pages)
+            next_assigned = 0
+            last_assigned = None  # (page_num, doc_type) of the closest assigned page so far
             
-            # Look for unassigned continuation/translation pages within safe boundaries
             for page_num in range(boundaries['min_page'], boundaries['safe_upper_bound'] + 1):
-                if page_num not in all_identified_pages:
-                    page_student_info = self._check_page_belongs_to_student(pdf_path, page_num, student_id)
+                while next_assigned < len(assigned) and assigned[next_assigned][0] < page_num:
+                    last_assigned = assigned[next_assigned]
+                    next_assigned += 1
+                
+                if page_num not in all_identified_pages and last_assigned is not None:
+                    markers = page_markers.get(page_num)
+                    if markers is None:
+                        markers = page_markers[page_num] = self._classify_page(page_texts[page_num])
+                    page_student_info = self._check_page_belongs_to_student(markers, student_id)
                     
                     if page_student_info:
-                        if doc_groups:
-                            best_doc_type = None
-                            best_distance = float('inf')
-                            
-                            for doc_type, doc_pages in doc_groups.items():
-                                relevant_pages = [p for p in doc_pages if p < page_num]
-                                if relevant_pages:
-                                    distance = page_num - max(relevant_pages)
-                                    if distance < best_distance:
-                                        best_distance = distance
-                                        best_doc_type = doc_type
-                            
-                            max_distance = 3 if best_doc_type == 'Notification of English Language Program Exit' else 1
-                            
-                            if best_doc_type and best_distance <= max_distance:
-                                doc_groups[best_doc_type].append(page_num)
-                                all_identified_pages.add(page_num)
-                                logger.debug(f"Assigned continuation/translation page {page_num + 1} to {student_id} - {best_doc_type}")
+                        best_page, best_doc_type = last_assigned
+                        best_distance = page_num - best_page
+                        max_distance = 3 if best_doc_type == 'Notification of English Language Program Exit' else 1
+                        
+                        if best_distance <= max_distance:
+                            doc_groups[best_doc_type].append(page_num)
+                            all_identified_pages.add(page_num)
+                            last_assigned = (page_num, best_doc_type)
+                            logger.debug(f"Assigned continuation/translation page {page_num + 1} to {student_id} - {best_doc_type}")
             
             # Create DocumentInfo for each document type
+            page_dates = {p['page_num']: p['rfep_date'] for p in pages}
             for doc_type, page_list in doc_groups.items():
                 if page_list:
+                    # The group's list isn't used again, so sort it in place and hand it over
+                    page_list.sort()
                     student_name = pages[0]['student_name']
                     documents.append(DocumentInfo(
                         file_path=str(pdf_path),
                         student_id=student_id,
                         student_name=student_name,
                         document_type=doc_type,
-                        pages=sorted(page_list),
-                        page_count=len(page_list)
+                        pages=page_list,
+                        page_count=len(page_list),
+                        rfep_date=page_dates.get(page_list[0])
                     ))
-                    logger.info(f"Created {doc_type} for {student_id} ({student_name}) - pages {sorted(page_list)}")
+                    logger.info(f"Created {doc_type} for {student_id} ({student_name}) - pages {page_list}")
         
         return documents
     
-    def _check_page_belongs_to_student(self, pdf_path: Path, page_num: int, student_id: str) -> bool:
-        """Check if a page belongs to a specific student (includes translations)"""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                if page_num < len(reader.pages):
-                    page = reader.pages[page_num]
-                    text = page.extract_text()
-                    text = self._normalize_ligatures(text)
-                    
-                    student_id_patterns = [
-                        rf'Student ID[#:\s]*{student_id}',
-                        rf'学号[#:\s]*{student_id}',
-                        rf'N°\s*de\s*identificación\s*del\s*estudiante[#:\s]*{student_id}',
-                    ]
-                    
-                    for pattern in student_id_patterns:
-                        if re.search(pattern, text, re.IGNORECASE):
-                            return True
-                    
-                    translation_markers = [
-                        r'退出英语教学计划的通知',
-                        r'Notificación de salida del programa de idioma inglés',
-                        r'学生信息',
-                        r'Información del estudiante',
-                    ]
-                    
-                    for marker in translation_markers:
-                        if re.search(marker, text, re.IGNORECASE):
-                            return True
-                    
-                    if re.search(r'signature|parent.*guardian|consulta', text, re.IGNORECASE):
-                        if not re.search(r'Student ID[#:\s]*\d{5,6}', text, re.IGNORECASE):
-                            return True
-        except:
-            pass
+    def _classify_page(self, text: str) -> PageMarkers:
+        """Find the student IDs and continuation/translation markers on a page"""
+        text = self._normalize_ligatures(text)
+        marker_kinds = set()
+        for match in _PAGE_MARKER_RE.finditer(text):
+            marker_kinds.add(match.lastgroup)
+            if len(marker_kinds) == 2:
+                break
         
-        return False
+        # Most continuation pages carry no ID label at all; skip the ID patterns for them
+        lowered = text.lower()
+        if any(label in lowered for label in _STUDENT_ID_LABELS) and _DIGIT_RUN_RE.search(text):
+            student_ids = frozenset(match.group(1) for match in _STUDENT_ID_RE.finditer(text))
+        else:
+            student_ids = frozenset()
+        return PageMarkers(
+            student_ids=student_ids,
+            is_translation='translation' in marker_kinds,
+            is_signature_page=('signature' in marker_kinds
+                               and ('student id' not in lowered
+                                    or _ENGLISH_STUDENT_ID_RE.search(text) is None)),
+        )
+    
+    def _check_page_belongs_to_student(self, markers: PageMarkers, student_id: str) -> bool:
+        """Check if a classified page belongs to a specific student (includes translations)"""
+        return student_id in markers.student_ids or markers.is_translation or markers.is_signature_page
     
     def _group_by_student(self, documents: List[DocumentInfo]) -> Dict[str, List[DocumentInfo]]:
         """Group documents by student ID"""
-        student_docs = {}
+        student_docs = defaultdict(list)
         for doc in documents:
-            if doc.student_id not in student_docs:
-                student_docs[doc.student_id] = []
             student_docs[doc.student_id].append(doc)
-        return student_docs
+        return dict(student_docs)
     
     def create_combined_pdfs(self, student_documents: Dict[str, List[DocumentInfo]]) -> Tuple[List[str], List[Dict], List[Dict]]:
         """Create combined PDFs for students with complete document sets"""
         created_files = []
         incomplete_students = []
         completed_students = []
-        
-        required_docs = {
-            'Teacher Recommendation Form',
-            'Reclassification Meeting', 
-            'Notification of English Language Program Exit'
-        }
+        completed_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Each source PDF holds many students' forms, so open it once for the whole run
+        sources: Dict[str, fitz.Document] = {}
         
         for student_id, docs in student_documents.items():
             # Find the best student name from all documents (prioritize non-"Unknown" names)
-            student_name = "Unknown"
-            for doc in docs:
-                if doc.student_id == student_id and doc.student_name and doc.student_name != "Unknown":
-                    student_name = doc.student_name
-                    break
+            # (docs are already grouped by student ID)
+            student_name = next(
+                (doc.student_name for doc in docs if doc.student_name and doc.student_name != "Unknown"),
+                "Unknown"
+            )
             
             # If still "Unknown", try to extract from any document more aggressively
             if student_name == "Unknown":
-                student_name = self._extract_student_name_from_docs(student_id, docs)
+                student_name = self._extract_student_name_from_docs(student_id, docs, sources)
             
-            found_doc_types = {doc.document_type for doc in docs}
+            doc_mask = 0
+            total_pages = 0
+            for doc in docs:
+                doc_mask |= self._REQUIRED_DOC_BITS.get(doc.document_type, 0)
+                total_pages += doc.page_count
             
-            if required_docs.issubset(found_doc_types):
+            if doc_mask == self._ALL_REQUIRED_DOCS:
                 try:
-                    output_filename = f"{student_id}_{student_name.replace(' ', '_')}_Reclassification_Paperwork.pdf"
+                    sorted_docs = self._sort_documents_by_priority(docs)
+                    # The combined PDF opens with the first sorted document's first page
+                    rfep_date = sorted_docs[0].rfep_date
+                    
+                    # Put the RFEP date in the filename so it can be read back without opening the PDF
+                    filename_date = self._filename_date(rfep_date)
+                    date_part = f"_{filename_date}" if filename_date else ""
+                    output_filename = f"{student_id}_{student_name.replace(' ', '_')}{date_part}_Reclassification_Paperwork.pdf"
                     output_path = self.output_dir / output_filename
                     
-                    sorted_docs = self._sort_documents_by_priority(docs)
-                    self._combine_documents(sorted_docs, output_path)
+                    self._combine_documents(sorted_docs, output_path, sources)
                     created_files.append(str(output_path))
                     
                     # Track completed student info
                     completed_students.append({
                         'student_id': student_id,
                         'student_name': student_name,
-                        'completed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'output_file': output_filename
+                        'completed_date': completed_date,
+                        'output_file': output_filename,
+                        'rfep_date': rfep_date
                     })
                     
                     logger.info(f"Created complete PDF for {student_name} (ID: {student_id}): {output_filename}")
@@ -407,54 +505,72 @@ class ReclassificationProcessor:
                         'student_id': student_id,
                         'student_name': student_name,
                         'error': str(e),
-                        'found_documents': list(found_doc_types),
+                        'found_documents': list({doc.document_type for doc in docs}),
                         'missing_documents': [],
-                        'total_pages': sum(doc.page_count for doc in docs)
+                        'total_pages': total_pages
                     })
             else:
-                missing_docs = required_docs - found_doc_types
+                missing_docs = [title for title, bit in self._REQUIRED_DOC_BITS.items() if not doc_mask & bit]
                 incomplete_students.append({
                     'student_id': student_id,
                     'student_name': student_name,
-                    'found_documents': list(found_doc_types),
-                    'missing_documents': list(missing_docs),
-                    'total_pages': sum(doc.page_count for doc in docs)
+                    'found_documents': list({doc.document_type for doc in docs}),
+                    'missing_documents': missing_docs,
+                    'total_pages': total_pages
                 })
                 
                 logger.warning(f"Incomplete paperwork for {student_name} (ID: {student_id}). Missing: {', '.join(missing_docs)}")
         
+        for source in sources.values():
+            source.close()
+        
         return created_files, incomplete_students, completed_students
     
-    def _extract_student_name_from_docs(self, student_id: str, docs: List[DocumentInfo]) -> str:
-        """Extract student name by re-reading the first page of each document"""
+    @staticmethod
+    def _filename_date(rfep_date: Optional[str]) -> Optional[str]:
+        """Convert an extracted MM/DD/YYYY-style date to YYYY-MM-DD for output filenames"""
+        if not rfep_date:
+            return None
+        try:
+            return datetime.strptime(_DATE_SEPARATOR_RE.sub('/', rfep_date), '%m/%d/%Y').strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    
+    def _extract_student_name_from_docs(self, student_id: str, docs: List[DocumentInfo],
+                                        sources: Optional[Dict[str, fitz.Document]] = None) -> str:
+        """
+        Extract student name by re-reading the first page of each document
+        
+        Args:
+            student_id: Student whose name to look for
+            docs: The student's documents
+            sources: Optional cache of open source PDFs, as for _combine_documents;
+                sources opened here are added to it for the caller to close
+        """
         for doc in docs:
             try:
-                with open(doc.file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    if doc.pages and doc.pages[0] < len(reader.pages):
-                        page = reader.pages[doc.pages[0]]
-                        text = page.extract_text()
-                        text = self._normalize_ligatures(text)
-                        
-                        # Try multiple name extraction patterns
-                        name_patterns = [
-                            rf'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{{2,40}}?)\s+Student ID[#:\s]*{student_id}',
-                            rf'([A-Za-z][A-Za-z\s\'-]{{2,40}})\s+{student_id}\s+',
-                            rf'(?:Name|Student)[:\s]+([A-Za-z][A-Za-z\s\'-]{{2,40}}?)\s+Grade',
-                            r'Name[:\s]+([A-Za-z][A-Za-z\s\'-]{2,40}?)\s+Student\s+ID',
-                        ]
+                # Only the document's first page is loaded
+                if sources is None:
+                    texts = extract_page_texts(doc.file_path, pages=doc.pages[:1])
+                else:
+                    source = sources.get(doc.file_path)
+                    if source is None:
+                        source = sources[doc.file_path] = fitz.open(doc.file_path)
+                    texts = document_page_texts(source, pages=doc.pages[:1])
+                for text in texts:
+                    text = self._normalize_ligatures(text)
                         
-                        for pattern in name_patterns:
-                            match = re.search(pattern, text, re.IGNORECASE)
-                            if match:
-                                name = match.group(1).strip()
-                                name = re.sub(r'\s+', ' ', name)
-                                name = re.sub(r'^[\s\-\']+|[\s\-\']+$', '', name)
-                                if len(name) > 2 and not any(char.isdigit() for char in name):
-                                    noise_words = ['student id', 'grade', 'level', 'school', 'status']
-                                    if not any(noise.lower() in name.lower() for noise in noise_words):
-                                        logger.info(f"Extracted name '{name}' for student {student_id} from {doc.document_type}")
-                                        return name
+                    # Try multiple name extraction patterns
+                    for pattern in _fallback_name_res(student_id):
+                        match = pattern.search(text)
+                        if match:
+                            name = ' '.join(match.group(1).split())
+                            name = _NAME_TRIM_RE.sub('', name)
+                            if len(name) > 2 and not any(char.isdigit() for char in name):
+                                noise_words = ['student id', 'grade', 'level', 'school', 'status']
+                                if not any(noise.lower() in name.lower() for noise in noise_words):
+                                    logger.info(f"Extracted name '{name}' for student {student_id} from {doc.document_type}")
+                                    return name
             except Exception as e:
                 logger.debug(f"Could not extract name from {doc.document_type}: {e}")
                 continue
@@ -483,14 +599,13 @@ class ReclassificationProcessor:
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 
                 writer.writeheader()
-                for student in incomplete_students:
-                    writer.writerow({
-                        'Student ID': student['student_id'],
-                        'Student Name': student['student_name'],
-                        'Missing Documents': '; '.join(student.get('missing_documents', [])),
-                        'Found Documents': '; '.join(student.get('found_documents', [])),
-                        'Error': student.get('error', '')
-                    })
+                writer.writerows({
+                    'Student ID': student['student_id'],
+                    'Student Name': student['student_name'],
+                    'Missing Documents': '; '.join(student.get('missing_documents', [])),
+                    'Found Documents': '; '.join(student.get('found_documents', [])),
+                    'Error': student.get('error', '')
+                } for student in incomplete_students)
             
             logger.info(f"Exported missing paperwork CSV: {output_path}")
             return str(output_path)
@@ -539,8 +654,7 @@ class ReclassificationProcessor:
                 
                 writer.writeheader()
                 # Sort by Student ID for consistent ordering
-                for student_id in sorted(existing_students.keys()):
-                    writer.writerow(existing_students[student_id])
+                writer.writerows(existing_students[student_id] for student_id in sorted(existing_students))
             
             new_count = len(completed_students)
             total_count = len(existing_students)
@@ -554,37 +668,70 @@ class ReclassificationProcessor:
     
     def _sort_documents_by_priority(self, docs: List[DocumentInfo]) -> List[DocumentInfo]:
         """Sort documents in the required order"""
-        order_priority = {
-            'Notification of English Language Program Exit': 1,
-            'Reclassification Meeting': 2,
-            'Teacher Recommendation Form': 3,
+        # Only a few known types, so place each document in its type's bucket
+        # (stable, like the sort it replaces) instead of sorting
+        buckets = {
+            'Notification of English Language Program Exit': [],
+            'Reclassification Meeting': [],
+            'Teacher Recommendation Form': [],
         }
+        other_docs = []
+        for doc in docs:
+            buckets.get(doc.document_type, other_docs).append(doc)
         
-        return sorted(docs, key=lambda x: (order_priority.get(x.document_type, 999), x.document_type))
+        ordered = [doc for bucket in buckets.values() for doc in bucket]
+        ordered.extend(sorted(other_docs, key=lambda x: x.document_type))
+        return ordered
     
-    def _combine_documents(self, docs: List[DocumentInfo], output_path: Path):
-        """Combine multiple documents into a single PDF"""
-        writer = PyPDF2.PdfWriter()
-        
-        for doc in docs:
-            logger.debug(f"Adding {doc.document_type} for student {doc.student_id} - pages {doc.pages}")
+    def _combine_documents(self, docs: List[DocumentInfo], output_path: Path,
+                           sources: Optional[Dict[str, fitz.Document]] = None):
+        """
+        Combine multiple documents into a single PDF
+        
+        Args:
+            docs: Documents to add, in order
+            output_path: Where to save the combined PDF
+            sources: Optional cache of open source PDFs (file path -> document) shared
+                across calls; the caller closes them. Without it, sources opened here
+                are closed before returning.
+        """
+        # A student's documents usually come from the same source PDF, so each
+        # source is opened and parsed once; docs are still added in their given order.
+        # insert_pdf copies pages by object reference into the output's xref, and
+        # objects shared between pages (fonts, images) are only copied once per source
+        with ExitStack() as stack:
+            combined = stack.enter_context(fitz.open())
+            owns_sources = sources is None
+            if owns_sources:
+                sources = {}
+            # Overlapping documents must not add the same source page twice
+            added_pages = set()
             
-            try:
-                with open(doc.file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
+            for doc in docs:
+                logger.debug(f"Adding {doc.document_type} for student {doc.student_id} - pages {doc.pages}")
+                
+                try:
+                    source = sources.get(doc.file_path)
+                    if source is None:
+                        source = fitz.open(doc.file_path)
+                        sources[doc.file_path] = source
+                        if owns_sources:
+                            stack.enter_context(source)
                     
                     for page_num in doc.pages:
-                        if page_num < len(reader.pages):
-                            writer.add_page(reader.pages[page_num])
+                        if (doc.file_path, page_num) in added_pages:
+                            continue
+                        if page_num < source.page_count:
+                            added_pages.add((doc.file_path, page_num))
+                            combined.insert_pdf(source, from_page=page_num, to_page=page_num)
                         else:
                             logger.warning(f"Page {page_num} not found in {doc.file_path}")
+                
+                except Exception as e:
+                    logger.error(f"Error reading document {doc.file_path}: {e}")
+                    continue
             
-            except Exception as e:
-                logger.error(f"Error reading document {doc.file_path}: {e}")
-                continue
-        
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+            combined.save(str(output_path), garbage=1)
     
     def run(self) -> Dict:
         """Main processing method"""
@@ -628,6 +775,10 @@ class ReclassificationProcessor:
             'created_files': created_files,
             'incomplete_details': incomplete_students,
             'completed_details': completed_students,
+            'rfep_dates': {
+                str(self.output_dir / student['output_file']): student['rfep_date']
+                for student in completed_students
+            },
             'csv_files': csv_files
         }
 
@@ -1,11 +1,10 @@
-import PyPDF2
+from pdf_text import extract_page_texts
 
-with open('in/Notification of Ext 9-18-2025.pdf', 'rb') as f:
-    reader = PyPDF2.PdfReader(f)
-    page1_text = reader.pages[0].extract_text()
-    print("PAGE 1 TEXT:")
-    print(repr(page1_text[:1000]))
-    print("\n\nSEARCHING FOR:")
-    print("'Notification' found:", 'Notification' in page1_text)
-    print("'106874' found:", '106874' in page1_text)
+# Same extractor the processor uses, so this shows exactly the text it matches against
+page1_text = extract_page_texts('in/Notification of Ext 9-18-2025.pdf', pages=[0])[0]
+print("PAGE 1 TEXT:")
+print(repr(page1_text[:1000]))
+print("\n\nSEARCHING FOR:")
+print("'Notification' found:", 'Notification' in page1_text)
+print("'106874' found:", '106874' in page1_text)
     
\ No newline at end of file
@@ -4,6 +4,7 @@ Test script for the Reclassification PDF Processor
 """
 
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -12,6 +13,9 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from reclassification_processor import ReclassificationProcessor
 
+# Student ID pattern for the analyze mode previews
+_STUDENT_ID_RE = re.compile(r'Student ID[#:\s]*(\d{5,6})', re.IGNORECASE)
+
 def test_processor():
     """Test the processor with sample data"""
     
@@ -70,7 +74,8 @@ def test_processor():
 
 def analyze_pdf_structure():
     """Analyze the structure of PDFs in the input folder for debugging"""
-    import PyPDF2
+    import fitz
+    from pdf_text import document_page_texts
     
     input_dir = Path("in")
     pdf_files = list(input_dir.glob("*.pdf"))
@@ -86,24 +91,21 @@ def analyze_pdf_structure():
         print(f"\n📄 File: {pdf_file.name}")
         
         try:
-            with open(pdf_file, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                total_pages = len(reader.pages)
+            with fitz.open(str(pdf_file)) as doc:
+                total_pages = doc.page_count
                 
                 print(f"   Total pages: {total_pages}")
                 
                 # Analyze first few pages
-                for page_num in range(min(3, total_pages)):
-                    page = reader.pages[page_num]
-                    text = page.extract_text()[:500]  # First 500 characters
+                for page_num, text in enumerate(document_page_texts(doc, range(3))):
+                    text = text[:500]  # First 500 characters
                     
                     print(f"\n   Page {page_num + 1} preview:")
                     print(f"   {'-' * 30}")
                     print(f"   {text[:200]}...")
                     
                     # Look for student ID patterns
-                    import re
-                    student_id_match = re.search(r'Student ID[#:\s]*(\d{5,6})', text, re.IGNORECASE)
+                    student_id_match = _STUDENT_ID_RE.search(text)
                     if student_id_match:
                         print(f"   📋 Found Student ID: {student_id_match.group(1)}")
                     
@@ -1,4 +1,5 @@
 from decouple import config
+from pathlib import PureWindowsPath
 import re
 
 def upload_created_files(created_files):
@@ -13,7 +14,8 @@ def upload_created_files(created_files):
     
     uploaded_files = []
     for file_path in created_files:
-        student_id = file_path.split('\\')[1].split('_')[0].strip()
+        # PureWindowsPath splits on both \ and /, so the name is found for either style of path
+        student_id = PureWindowsPath(file_path).name.split('_', 1)[0].strip()
         print(f"Preparing to upload file for student ID: {student_id}")
        
     return uploaded_files